@@ -23,6 +23,7 @@ import re
 from maya import cmds, mel, standalone
 
 _RE_MAYA_COMMAND_FLAGS = re.compile(r"-(?P<short>\w+) -(?P<long>\w+)")
+_KEYWORDS = frozenset(keyword.kwlist)
 
 
 def generate(file_path: str) -> None:
@@ -37,19 +38,18 @@ def generate(file_path: str) -> None:
 
     for command, data in inspect.getmembers(cmds):
         try:
-            text = mel.eval("help {}".format(command))
-
-            arg_dict = {}
-            for keys in _RE_MAYA_COMMAND_FLAGS.finditer(text):
-                if keyword.iskeyword(keys.group("long")) or keyword.iskeyword(keys.group("short")):
-                    continue
-
-                arg_dict[keys.group("short")] = keys.group("long")
+            text = mel.eval(f"help {command}")
+            # Group 1 is the short flag name and group 2 the long flag name.
+            arg_dict = {
+                keys[1]: keys[2]
+                for keys in _RE_MAYA_COMMAND_FLAGS.finditer(text)
+                if keys[1] not in _KEYWORDS and keys[2] not in _KEYWORDS
+            }
 
             if arg_dict:
                 all_commands[command] = arg_dict
         except Exception:
-            print("Error: {}".format(command))
+            print(f"Error: {command}")
 
     with open(file_path, "w") as outfile:
         json.dump(all_commands, outfile, indent=4)
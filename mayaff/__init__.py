@@ -13,18 +13,27 @@
 # limitations under the License.
 
 import argparse
+import functools
+import gc
+import itertools
 import multiprocessing
 import re
 import sys
 import os
 from concurrent import futures
-from typing import List, Tuple
+from typing import Iterable, Optional, Set, Tuple
 
-from mayaff import file_resources, mayaff_api, output
+from mayaff import cache, file_resources, mayaff_api, output
 from mayaff.config import MayaArgsConfig, MayaFileArgsConfig, CONFIG_OPTIONS, LATEST_CONFIG
 
 __version__ = "1.1.0"
 _DESCRIPTION = "Command line tool to find and replace short maya flags."
+_CHUNK_SIZE = 16  # Number of files sent to a worker at a time.
+_THREAD_POOL_THRESHOLD = 32  # Check fewer files than this on threads instead of processes.
+# Worker process state, set by `_init_worker`.
+_WORKER_CONFIG = None
+_WORKER_CACHED_HASHES = None
+_WORKER_CACHE_KEY = ""
 
 
 def config_exists(parser: argparse.ArgumentParser, file_path: str) -> None:
@@ -37,7 +46,7 @@ def set_up_argparser() -> argparse.Namespace:
     """Configure argparser."""
     parser = argparse.ArgumentParser(description=_DESCRIPTION)
     parser.add_argument("-v", "--version", action="version", version="%(prog)s {}".format(__version__))
-    parser.add_argument("source", nargs="+", help="Directory or files you want to format.")
+    parser.add_argument("source", nargs="*", help="Directory or files you want to format.")
 
     config_group = parser.add_mutually_exclusive_group()
 
@@ -82,12 +91,34 @@ def set_up_argparser() -> argparse.Namespace:
         help="Maya modules to use for import. Examples: --modules 'maya:cmds,pymel:core'",
     )
     parser.add_argument("--single-thread", action="store_true", default=False, help="Only execute mayaff on single thread.")
-    return parser.parse_args()
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        default=True,
+        help="Skip files that had nothing to format in previous runs (default).",
+    )
+    parser.add_argument("--no-cache", action="store_false", dest="cache", help="Don't read or write the cache.")
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        default=False,
+        help="Keep configs loaded and serve format requests on a unix socket (~/.mayaff.sock).",
+    )
+    args = parser.parse_args()
+    if not (args.source or args.daemon):
+        parser.error("the following arguments are required: source")
+    return args
 
 
 def _main() -> int:
     """Run command line app with return code."""
     args = set_up_argparser()
+    if args.daemon:
+        from mayaff import daemon  # Unix sockets are not available on all platforms.
+
+        daemon.serve()
+        return 0
+
     modules = [tuple(m.split(":")) for m in args.modules.split(",")]
 
     _config = MayaFileArgsConfig(args.config, modules) if args.config else MayaArgsConfig(args.target_version, modules)
@@ -96,18 +127,26 @@ def _main() -> int:
     except re.error:
         raise UserWarning("Invalid exclude regular expression.")
 
-    files = file_resources.find_python_files(args.source, args.exclude_files, exclude_pattern=exclude_re)
-    if not files:
+    files = file_resources.iter_python_files(args.source, args.exclude_files, exclude_pattern=exclude_re)
+    files_changed, failed_files, number_of_files = _format_files(
+        files,
+        _config,
+        quiet=args.quiet,
+        check_only=args.check,
+        print_diff=args.diff,
+        single_thread=args.single_thread,
+        use_cache=args.cache,
+    )
+    if not number_of_files:
         raise UserWarning("No input files found.")
 
-    files_changed, failed_files = format_files(files, _config, quiet=args.quiet, check_only=args.check, print_diff=args.diff)
     if not args.quiet:
         msg = []
         if files_changed:
             plural = "s" if files_changed > 1 else ""
             msg.append(f"{files_changed} file{plural} reformatted")
-        if len(files) != files_changed + failed_files:
-            msg.append(f"{len(files) - files_changed} files left unchanged.")
+        if number_of_files != files_changed + failed_files:
+            msg.append(f"{number_of_files - files_changed} files left unchanged.")
 
         if failed_files:
             plural = "s" if failed_files > 1 else ""
@@ -121,12 +160,13 @@ def _main() -> int:
 
 
 def format_files(
-    file_paths: List[str],
+    file_paths: Iterable[str],
     config: MayaArgsConfig,
     quiet: bool = False,
     check_only: bool = False,
     print_diff: bool = False,
     single_thread: bool = False,
+    use_cache: bool = False,
 ) -> Tuple[int, int]:
     """Format files
 
@@ -137,66 +177,151 @@ def format_files(
         check_only: If True don't write result back to file.
         print_diff: If True only print diff and don't write to file.
         single_thread: If True only execute process on one thread.
+        use_cache: If True skip files cached as having nothing to format and cache new ones.
+
+    Returns:
+        tuple: (Number of files updated, Number of files failed).
+
+    """
+    return _format_files(file_paths, config, quiet, check_only, print_diff, single_thread, use_cache)[:2]
+
+
+def _format_files(
+    file_paths: Iterable[str],
+    config: MayaArgsConfig,
+    quiet: bool = False,
+    check_only: bool = False,
+    print_diff: bool = False,
+    single_thread: bool = False,
+    use_cache: bool = False,
+) -> Tuple[int, int, int]:
+    """Format files and count them.
+
+    Files are dispatched to the workers in batches while `file_paths` is still being consumed, so a lazy
+    iterable (e.g from `file_resources.iter_python_files`) finds the next batch while the workers format the
+    current one. It's consumed on this thread, as forking workers from a process running other threads can deadlock.
+
+    Args:
+        file_paths: Python file paths to format.
+        config: Config class to use for parsing.
+        quiet: If True don't print anything.
+        check_only: If True don't write result back to file.
+        print_diff: If True only print diff and don't write to file.
+        single_thread: If True only execute process on one thread.
+        use_cache: If True skip files cached as having nothing to format and cache new ones.
 
     Returns:
-        tuple: (Diff found, Number of files updated).
+        tuple: (Number of files updated, Number of files failed, Number of files processed).
 
     """
     cpu = 1 if single_thread else multiprocessing.cpu_count()
-    number_of_workers = min(cpu, len(file_paths))
-    with futures.ProcessPoolExecutor(number_of_workers) as executor:
-        workers = [
-            executor.submit(
-                _format_file,
-                file_name=file_name,
-                config=config,
-                quiet=quiet,
-                check_only=check_only,
-                print_diff=print_diff,
-            )
-            for file_name in file_paths
-        ]
-
-        reformatted_files = 0
-        failed_files = 0
-        for future in futures.as_completed(workers):
-            changed, failed = future.result()
-            reformatted_files += changed
-            failed_files += failed
-
-    return reformatted_files, failed_files
+    file_paths = iter(file_paths)
+    batch = list(itertools.islice(file_paths, max(cpu * _CHUNK_SIZE, _THREAD_POOL_THRESHOLD)))
+    if not batch:
+        return 0, 0, 0
+
+    number_of_workers = min(cpu, len(batch))
+    chunksize = max(1, min(_CHUNK_SIZE, len(batch) // (number_of_workers * 4)))
+    format_file = functools.partial(_format_file, quiet=quiet, check_only=check_only, print_diff=print_diff)
+    # Nothing is written when only checking, so a few files are cheaper to check on threads
+    # than paying for starting processes and sending them the config.
+    use_threads = check_only and len(batch) < _THREAD_POOL_THRESHOLD
+    executor_class = futures.ThreadPoolExecutor if use_threads else futures.ProcessPoolExecutor
+
+    use_cache = use_cache and config.cache_key() is not None
+    cached_hashes = cache.load_hashes() if use_cache else None
+
+    # Forked workers share the config already loaded by this process. Moving it to the permanent
+    # generation stops garbage collection in the workers from writing to (and copying) those pages.
+    # Objects the caller already froze are left alone, as unfreezing afterwards would unfreeze them too.
+    freeze = (
+        not use_threads and gc.get_freeze_count() == 0 and multiprocessing.get_context().get_start_method() == "fork"
+    )
+    if freeze:
+        gc.freeze()
+
+    results = []
+    number_of_files = 0
+    try:
+        with executor_class(number_of_workers, initializer=_init_worker, initargs=(config, cached_hashes)) as executor:
+            pending_results = []
+            while batch:
+                number_of_files += len(batch)
+                pending_results.append(executor.map(format_file, batch, chunksize=chunksize))
+                if len(pending_results) > 1:
+                    # Collect the previous batch while the workers start on this one.
+                    results.extend(pending_results.pop(0))
+                batch = list(itertools.islice(file_paths, number_of_workers * _CHUNK_SIZE))
+
+            for batch_results in pending_results:
+                results.extend(batch_results)
+    finally:
+        if freeze:
+            gc.unfreeze()
+
+    if use_cache:
+        cache.save_hashes([clean_hash for _, _, clean_hash in results if clean_hash], cached_hashes)
+
+    reformatted_files = sum(changed for changed, _, _ in results)
+    failed_files = sum(failed for _, failed, _ in results)
+    return reformatted_files, failed_files, number_of_files
+
+
+def _init_worker(config: MayaArgsConfig, cached_hashes: Optional[Set[str]] = None) -> None:
+    """Store config in worker process so it's only sent once per worker.
+
+    Args:
+        config: Maya commands config.
+        cached_hashes: Hashes of files with nothing to format, None if cache is disabled.
+
+    """
+    global _WORKER_CONFIG, _WORKER_CACHED_HASHES, _WORKER_CACHE_KEY
+    _WORKER_CONFIG = config
+    _WORKER_CACHED_HASHES = cached_hashes
+    _WORKER_CACHE_KEY = f"{__version__}:{config.cache_key()}"
 
 
 def _format_file(
     file_name: str,
-    config: MayaArgsConfig = None,
     quiet: bool = False,
     check_only: bool = False,
     print_diff: bool = False,
-) -> Tuple[int, int]:
-    """Reformat file.
+) -> Tuple[int, int, Optional[str]]:
+    """Reformat file with the config of the worker process.
 
     Args:
         file_name: File path to file to format.
-        config (optional) Maya commands config.
         quiet: If True don't print messages.
         check_only: Don't write changes only return status.
         print_diff: If True only print diff.
 
     Returns:
-        (File changed, Failed).
+        (File changed, Failed, File hash to cache if there was nothing to format).
 
     """
     try:
+        data = file_hash = None
+        if _WORKER_CACHED_HASHES is not None:
+            # Read the file once for both hashing and formatting.
+            data = file_resources.read_file_bytes(file_name)
+            file_hash = cache.content_hash(data, _WORKER_CACHE_KEY)
+            if file_hash in _WORKER_CACHED_HASHES:
+                return 0, 0, None
+
         result = mayaff_api.format_file(
-            file_name=file_name, config=config, quiet=quiet, check_only=check_only, print_diff=print_diff
+            file_name=file_name,
+            config=_WORKER_CONFIG,
+            quiet=quiet,
+            check_only=check_only,
+            print_diff=print_diff,
+            data=data,
         )
-        return int(result), 0
+        return int(result), 0, None if result else file_hash
     except Exception as e:
         output.print_failed(str(e))
         if not quiet:
             output.print_failed(f"Failed to reformat {file_name}.")
-        return 0, 1
+        return 0, 1, None
 
 
 def run() -> None:
@@ -0,0 +1,72 @@
+# Copyright (C) 2022  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import os
+import tempfile
+from typing import Iterable, Set
+
+CACHE_DIR = os.environ.get("MAYAFF_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "mayaff")
+_CACHE_FILE = os.path.join(CACHE_DIR, "clean_files.txt")
+_MAX_ENTRIES = 100000
+
+
+def content_hash(data: bytes, key: str) -> str:
+    """Hash file content together with the settings used to format it.
+
+    Args:
+        data: File content to hash.
+        key: Settings the formatting result depends on e.g mayaff version and config.
+
+    Returns:
+        Hex digest of content.
+
+    """
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16)
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def load_hashes() -> Set[str]:
+    """Load hashes of files without flags to reformat.
+
+    Returns:
+        Cached file hashes, empty if there is no cache.
+
+    """
+    try:
+        with open(_CACHE_FILE) as f:
+            return set(f.read().split())
+    except OSError:
+        return set()
+
+
+def save_hashes(hashes: Iterable[str], previous_hashes: Iterable[str] = ()) -> None:
+    """Write hashes of files without flags to reformat.
+
+    The newest hashes are kept if there are more than `_MAX_ENTRIES`. Failing to write the cache is ignored.
+
+    Args:
+        hashes: New file hashes to save.
+        previous_hashes: Already cached file hashes to keep.
+
+    """
+    hashes = list(dict.fromkeys([*hashes, *previous_hashes]))[:_MAX_ENTRIES]
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=CACHE_DIR, delete=False) as f:
+            f.write("\n".join(hashes))
+        os.replace(f.name, _CACHE_FILE)
+    except OSError:
+        pass
@@ -12,17 +12,56 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import List, Tuple
-import json
+from typing import List, Optional, Tuple
+import functools
 import os
-import pkg_resources
-import pkgutil
+import pathlib
 
-CONFIG_OPTIONS = [
-    f.replace(".json", "") for f in pkg_resources.resource_listdir("mayaff", "maya_configs") if f.endswith(".json")
-]
-CONFIG_OPTIONS.sort()
-LATEST_CONFIG = max(CONFIG_OPTIONS, key=int)
+try:
+    import orjson as _json  # Optional, parses the configs a lot faster.
+except ImportError:
+    import json as _json
+
+try:
+    from importlib.resources import files
+
+    _CONFIG_DIR = files("mayaff").joinpath("maya_configs")
+except ImportError:  # Python < 3.9.
+    _CONFIG_DIR = pathlib.Path(__file__).parent.joinpath("maya_configs")
+
+_CONFIG_VERSIONS = sorted((int(p.name[:-5]), p.name[:-5]) for p in _CONFIG_DIR.iterdir() if p.name.endswith(".json"))
+CONFIG_OPTIONS = [name for _, name in _CONFIG_VERSIONS]
+LATEST_CONFIG = _CONFIG_VERSIONS[-1][1]
+
+
+@functools.lru_cache(maxsize=None)
+def _load_config(config_version: str) -> dict:
+    """Load bundled config once per process.
+
+    Args:
+        config_version: Configuration name.
+
+    Returns:
+        Command flags data.
+
+    """
+    return _json.loads(_CONFIG_DIR.joinpath(f"{config_version}.json").read_bytes())
+
+
+@functools.lru_cache(maxsize=16)
+def _load_config_file(file_path: str, mtime: float) -> dict:
+    """Load config file once per process and file modification.
+
+    Args:
+        file_path: Config file path to load.
+        mtime: Modification time of config file, used to invalidate the cache.
+
+    Returns:
+        Command flags data.
+
+    """
+    with open(file_path, "rb") as f:
+        return _json.loads(f.read())
 
 
 class BaseMayaConfig(object):
@@ -54,6 +93,27 @@ class BaseMayaConfig(object):
         """
         return self._command_data.get(command_name, {})
 
+    def has_command(self, command_name: str) -> bool:
+        """Check if command has flags in config.
+
+        Args:
+            command_name: Maya command name to check.
+
+        Returns:
+            True if command is in config else False.
+
+        """
+        return command_name in self._command_data
+
+    def cache_key(self) -> Optional[str]:
+        """Key identifying the flags and modules of config, used to cache formatting results.
+
+        Returns:
+            Key or None if the config can't be cached.
+
+        """
+        return None
+
 
 class MayaArgsConfig(BaseMayaConfig):
     """Class to manage maya flags configuration."""
@@ -67,7 +127,15 @@ class MayaArgsConfig(BaseMayaConfig):
 
         """
         super().__init__(modules)
-        self._command_data = json.loads(pkgutil.get_data("mayaff", f"maya_configs/{config_version}.json"))
+        self.config_version = config_version
+        self._command_data = _load_config(config_version)
+
+    def __reduce__(self):
+        # Only send the version when pickled to worker processes, the data is reloaded from the cache.
+        return self.__class__, (self.config_version, self.modules)
+
+    def cache_key(self) -> Optional[str]:
+        return f"{self.config_version}:{self.modules}"
 
 
 class MayaFileArgsConfig(BaseMayaConfig):
@@ -85,5 +153,12 @@ class MayaFileArgsConfig(BaseMayaConfig):
         if not os.path.exists(file_path):
             raise OSError(f'Config file "{file_path}" does not exist')
 
-        with open(file_path) as f:
-            self._command_data = json.load(f)
+        self.file_path = file_path
+        self._command_data = _load_config_file(file_path, os.path.getmtime(file_path))
+
+    def __reduce__(self):
+        # Only send the file path when pickled to worker processes, the data is reloaded from the cache.
+        return self.__class__, (self.file_path, self.modules)
+
+    def cache_key(self) -> Optional[str]:
+        return f"{os.path.realpath(self.file_path)}:{os.path.getmtime(self.file_path)}:{self.modules}"
@@ -0,0 +1,234 @@
+# Copyright (C) 2022  Max Wiklund
+#
+# Licensed under the Apache License, Version 2.0 (the “License”);
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import json
+import os
+import re
+import socket
+import socketserver
+import threading
+from typing import List, Optional, Tuple
+
+from mayaff import file_resources, mayaff_api, output
+from mayaff.config import CONFIG_OPTIONS, LATEST_CONFIG, BaseMayaConfig, MayaArgsConfig, MayaFileArgsConfig
+
+SOCKET_PATH = os.path.join(os.path.expanduser("~"), ".mayaff.sock")
+_DEFAULT_MODULES = "maya:cmds,pymel:core"
+_MAX_CONFIGS = 32  # Number of loaded configs to keep, the least recently used are dropped first.
+_RE_MODULE = re.compile(r"[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)*:[A-Za-z_]\w*")
+
+
+def _parse_modules(modules: str) -> List[Tuple[str, str]]:
+    """Parse maya modules argument.
+
+    Args:
+        modules: Maya modules e.g `maya:cmds,pymel:core`.
+
+    Raises:
+        ValueError: If any of the modules is invalid.
+
+    Returns:
+        Maya modules e.g `[("maya", "cmds"), ("pymel", "core")]`.
+
+    """
+    if not isinstance(modules, str) or not all(_RE_MODULE.fullmatch(m) for m in modules.split(",")):
+        raise ValueError(f"Invalid modules {modules!r}, expected e.g 'maya:cmds,pymel:core'")
+    return [tuple(m.split(":")) for m in modules.split(",")]
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Handle one json request per connection.
+
+    Requests are a json object on one line:
+        `{"cmd": "format", "path": "/file.py", "version": "2023", "modules": "maya:cmds", "check": false, "diff": false}`
+        `{"cmd": "format", "source": "from maya import cmds\\n...", "config": "/config.json"}`
+
+    Diffs are colored if the request sets `"color": true`.
+
+    The response is a json object on one line with `changed` and either `source`, `diff` or `error`.
+
+    """
+
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line:
+            return  # Connection closed without a request e.g checking if the server is running.
+
+        try:
+            response = self.server.handle_request_data(json.loads(line))
+        except Exception as e:
+            response = {"error": str(e)}
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class MayaffServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Server keeping configs loaded between format requests."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str = SOCKET_PATH):
+        """Construct server and load all bundled configs.
+
+        Args:
+            socket_path: Unix socket path to listen on.
+
+        """
+        super().__init__(socket_path, _RequestHandler)
+        # Requests can rewrite and read files, so only the owner may connect.
+        os.chmod(socket_path, 0o600)
+        self._configs = collections.OrderedDict()
+        self._lock = threading.Lock()
+        for config_version in CONFIG_OPTIONS:
+            self._get_config(config_version, None, _DEFAULT_MODULES)
+
+    def _get_config(self, config_version: str, config_path: Optional[str], modules: str) -> BaseMayaConfig:
+        """Get loaded config or load it.
+
+        Args:
+            config_version: Bundled config name.
+            config_path: Custom config file path, used instead of `config_version` if set.
+            modules: Maya modules e.g `maya:cmds,pymel:core`.
+
+        Raises:
+            ValueError: If the config version or modules are invalid.
+
+        Returns:
+            Maya commands config.
+
+        """
+        if config_version not in CONFIG_OPTIONS:
+            raise ValueError(f"Unknown config version {config_version!r}, expected one of {', '.join(CONFIG_OPTIONS)}")
+        _modules = _parse_modules(modules)
+
+        # Include modification time so edited config files are reloaded.
+        key = (config_version, config_path and f"{config_path}:{os.path.getmtime(config_path)}", modules)
+        with self._lock:
+            if key in self._configs:
+                self._configs.move_to_end(key)
+                return self._configs[key]
+
+            if config_path:
+                config = MayaFileArgsConfig(config_path, _modules)
+            else:
+                config = MayaArgsConfig(config_version, _modules)
+            self._configs[key] = config
+            if len(self._configs) > _MAX_CONFIGS:
+                self._configs.popitem(last=False)
+            return config
+
+    def handle_request_data(self, request: dict) -> dict:
+        """Format source or file from request.
+
+        Args:
+            request: Decoded json request.
+
+        Raises:
+            ValueError: If the request is invalid.
+
+        Returns:
+            Response to encode as json.
+
+        """
+        if request.get("cmd") != "format":
+            raise ValueError(f"Unknown command {request.get('cmd')}")
+
+        # Relative paths would be resolved against the working directory of the server, not the client.
+        for key in ("path", "config"):
+            if request.get(key) and not os.path.isabs(request[key]):
+                raise ValueError(f"Expected absolute {key}, got {request[key]!r}")
+
+        config = self._get_config(
+            request.get("version", LATEST_CONFIG), request.get("config"), request.get("modules", _DEFAULT_MODULES)
+        )
+        if "source" in request:
+            source_code = mayaff_api.format_string(request["source"], config)
+            return {"changed": source_code != request["source"], "source": source_code}
+
+        file_name = request["path"]
+        if request.get("diff"):
+            source_code = file_resources.read_file(file_name)[0]
+            reformatted_source = mayaff_api.format_string(source_code, config)
+            changed = reformatted_source != source_code
+            if not changed:
+                return {"changed": False, "diff": ""}
+            diff = output.diff(source_code, reformatted_source, file_name, color=bool(request.get("color")))
+            return {"changed": True, "diff": diff}
+
+        changed = mayaff_api.format_file(file_name, config, quiet=True, check_only=request.get("check", False))
+        return {"changed": changed}
+
+
+def is_running(socket_path: str = SOCKET_PATH) -> bool:
+    """Check if a server is listening on socket.
+
+    Args:
+        socket_path: Unix socket path of server.
+
+    Returns:
+        True if a server accepts connections else False.
+
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            return False
+    return True
+
+
+def serve(socket_path: str = SOCKET_PATH) -> None:
+    """Listen for format requests until interrupted.
+
+    Args:
+        socket_path: Unix socket path to listen on.
+
+    Raises:
+        UserWarning: If another server is already listening on socket.
+
+    """
+    if os.path.exists(socket_path):
+        if is_running(socket_path):
+            raise UserWarning(f"mayaff daemon is already running on {socket_path}.")
+        os.remove(socket_path)  # Left behind by a server that didn't shut down.
+
+    with MayaffServer(socket_path) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(socket_path)
+
+
+def request(data: dict, socket_path: str = SOCKET_PATH) -> dict:
+    """Send request to running server.
+
+    Args:
+        data: Request, see `_RequestHandler`. Relative paths are made absolute.
+        socket_path: Unix socket path of server.
+
+    Returns:
+        Decoded json response.
+
+    """
+    data = dict(data)
+    for key in ("path", "config"):
+        if data.get(key):
+            data[key] = os.path.abspath(data[key])
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(data).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            return json.loads(f.readline())
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import io
 import os
 import re
 import tokenize
@@ -24,45 +25,68 @@ def find_python_files(directorys_and_files: List[str], exclude_files: List[str],
     Args:
         directorys_or_files: List of directories and files to format.
         exclude_files: Local file paths to exclude.
-        exclude_pattern: Regular expression of file pattern to exclude.
+        exclude_pattern: Regular expression of file names to exclude.
 
     Returns:
         Found file paths that where not excluded by exclude pattern.
 
     """
-    exclude_files = [os.path.realpath(fn) for fn in exclude_files]
+    return list(iter_python_files(directorys_and_files, exclude_files, exclude_pattern))
+
+
+def iter_python_files(directorys_and_files: List[str], exclude_files: List[str], exclude_pattern: re.Pattern) -> Generator:
+    """Find files to format on disk without collecting them first.
+
+    Args:
+        directorys_or_files: List of directories and files to format.
+        exclude_files: Local file paths to exclude.
+        exclude_pattern: Regular expression of file names to exclude.
+
+    Yields:
+        Unique file paths that where not excluded by exclude pattern.
+
+    """
+    exclude_files = frozenset(os.path.realpath(fn) for fn in exclude_files)
     found_paths = set()
     for path in directorys_and_files:
         if os.path.isdir(path):
             for file_path in _walk_directory_and_find_valid_files(os.path.realpath(path)):
-                if exclude_pattern.match(file_path):
+                if exclude_pattern.match(os.path.basename(file_path)):
                     continue
-                if file_path in exclude_files:
+                if file_path in exclude_files or file_path in found_paths:
                     continue
                 found_paths.add(file_path)
+                yield file_path
         else:
             if path.endswith(".py"):
-                found_paths.add(os.path.realpath(path))
-
-    return list(found_paths)
+                file_path = os.path.realpath(path)
+                if file_path not in found_paths:
+                    found_paths.add(file_path)
+                    yield file_path
 
 
 def _walk_directory_and_find_valid_files(root_directory: str) -> Generator:
     """Recursively traverse directory and try to find python files.
 
     Args:
-        root_directory: Root directory to travers.
+        root_directory: Root directory to travers, expected to be a real path.
 
     Yields:
         File that ends with `.py`.
 
     """
-    for root, _, files in os.walk(root_directory):
-        for f in files:
-            if not f.endswith(".py"):
-                continue
+    try:
+        entries = os.scandir(root_directory)
+    except OSError:
+        return  # Same as `os.walk`, skip directories we can't read.
 
-            yield os.path.join(root, f)
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _walk_directory_and_find_valid_files(entry.path)
+            elif entry.name.endswith(".py"):
+                # The root directory is already a real path, so only links need to be resolved.
+                yield os.path.realpath(entry.path) if entry.is_symlink() else entry.path
 
 
 def read_file(file_name: str) -> Tuple[str, str]:
@@ -75,9 +99,37 @@ def read_file(file_name: str) -> Tuple[str, str]:
         File content and file encoding.
 
     """
-    encoding = file_encoding(file_name)
-    with open(file_name) as f:
-        return f.read(), encoding
+    return decode_source(read_file_bytes(file_name))
+
+
+def read_file_bytes(file_name: str) -> bytes:
+    """Read file content without decoding it.
+
+    Args:
+        file_name: File path to read.
+
+    Returns:
+        File content.
+
+    """
+    with open(file_name, "rb") as f:
+        return f.read()
+
+
+def decode_source(data: bytes) -> Tuple[str, str]:
+    """Decode python source code using the encoding declared in the source.
+
+    Args:
+        data: Source code to decode.
+
+    Returns:
+        Decoded source code and encoding.
+
+    """
+    encoding = tokenize.detect_encoding(io.BytesIO(data).readline)[0]
+    # Decode with universal newlines, the same as reading the file in text mode.
+    with io.TextIOWrapper(io.BytesIO(data), encoding=encoding) as text:
+        return text.read(), encoding
 
 
 def file_encoding(file_name: str) -> str:
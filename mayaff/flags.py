@@ -14,11 +14,10 @@
 
 import tokenize
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import List, NamedTuple, Optional
 
 
-@dataclass()
-class FlagArg:
+class FlagArg(NamedTuple):
     """Class representing Maya command flag."""
 
     short_name: str
@@ -32,6 +31,9 @@ class FlagArg:
 class FlagKwargs:
     """Class representing maya command with flags to reformat."""
 
+    # Declared manually as `dataclass(slots=True)` requires python 3.10.
+    __slots__ = ("command_name", "flag_tokens")
+
     command_name: str  # Maya command name.
     flag_tokens: List[Optional[FlagArg]]
 
@@ -47,10 +49,11 @@ def create_flag_arg(token: tokenize.TokenInfo, long_name: str) -> FlagArg:
         Class representing flag arg to format.
 
     """
+    _, string, (start_lineno, start), (_, end), _ = token
     return FlagArg(
-        short_name=token.string,
+        short_name=string,
         long_name=long_name,
-        lineno=token.start[0] - 1,  # Converting line start from 1 to 0.
-        start=token.start[1],
-        end=token.end[1],
+        lineno=start_lineno - 1,  # Converting line start from 1 to 0.
+        start=start,
+        end=end,
     )
@@ -14,6 +14,7 @@
 
 import io
 import os
+from typing import Optional
 
 from mayaff import file_resources, output, pyparser, reformatter
 from mayaff.config import MayaArgsConfig
@@ -25,6 +26,7 @@ def format_file(
     quiet: bool = False,
     check_only: bool = False,
     print_diff: bool = False,
+    data: Optional[bytes] = None,
 ) -> bool:
     """Reformat file.
 
@@ -34,24 +36,34 @@ def format_file(
         quiet: If True don't print messages.
         check_only: Don't write changes only return status.
         print_diff: If True only print diff.
+        data (optional): File content if it's already read, the file is read if not set.
 
     Raises:
-        SyntaxError: If source code is invalid.
+        SyntaxError: If source code imports a maya module and is invalid. Files without maya imports
+            are not parsed, so they are reported as unchanged even if they are invalid.
 
     Returns:
         bool: True if changes found else False.
 
     """
     config = config if config else MayaArgsConfig()
-    source_code, encoding = file_resources.read_file(file_name)
+    # Skip files without maya imports before decoding them.
+    data = file_resources.read_file_bytes(file_name) if data is None else data
+    if not pyparser.may_import_modules(data, config.modules):
+        return False
 
-    parser = pyparser.MayaFlagsParser(config)
-    flags = parser.parse_string(source_code, file_name)
+    source_code, encoding = file_resources.decode_source(data)
+    # When only checking, the first command with flags to reformat is enough.
+    parser = pyparser.MayaFlagsParser(config, stop_at_first_match=check_only)
+    flags = parser.parse_string(source_code, file_name, check_imports=False)
 
     if not flags or check_only:
         return bool(flags)
 
     reformatted_source = reformatter.reformat(source_code, flags)
+    if reformatted_source == source_code:
+        return False
+
     if print_diff:
         print(output.diff(source_code, reformatted_source, file_name))
         return True
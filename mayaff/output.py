@@ -14,19 +14,37 @@
 
 
 import difflib
+import sys
+from typing import Optional
+
+_BOLD = "\033[1m"
+_CYAN = "\033[36m"
+_GREEN = "\033[32m"
+_RED = "\033[31m"
+_RESET = "\033[0m"
+
+# Diff line color by line prefix. Three character prefixes are looked up before single characters.
+_DIFF_COLORS = {
+    "+++": _BOLD,
+    "---": _BOLD,
+    "@@ ": _CYAN,
+    "+": _GREEN,
+    "-": _RED,
+}
 
 
 def print_failed(msg: str) -> None:
-    print(f"\033[31m{msg}\033[0m")
+    print(f"{_RED}{msg}{_RESET}")
 
 
-def diff(source_a: str, source_b: str, file_name: str) -> str:
+def diff(source_a: str, source_b: str, file_name: str, color: Optional[bool] = None) -> str:
     """Generate diff of source with color.
 
     Args:
         source_a: Source code.
         source_b: Format source code.
         file_name: File name of source code.
+        color: If True add color to diff, by default the diff is only colored if stdout is a terminal.
 
     Returns:
         Diff string with color.
@@ -34,17 +52,13 @@ def diff(source_a: str, source_b: str, file_name: str) -> str:
     """
     a_lines = source_a.splitlines(keepends=True)
     b_lines = source_b.splitlines(keepends=True)
+    diff_lines = difflib.unified_diff(a_lines, b_lines, fromfile=file_name, tofile=file_name, n=3)
+    if not (sys.stdout.isatty() if color is None else color):
+        return "".join(diff_lines)
+
     lines = []
-    for line in difflib.unified_diff(a_lines, b_lines, fromfile=file_name, tofile=file_name, n=5):
-        if line.startswith("+++") or line.startswith("---"):
-            line = "\033[1m" + line + "\033[0m"  # bold, reset
-        elif line.startswith("@@"):
-            line = "\033[36m" + line + "\033[0m"  # cyan, reset
-        elif line.startswith("+"):
-            line = "\033[32m" + line + "\033[0m"  # green, reset
-        elif line.startswith("-"):
-            line = "\033[31m" + line + "\033[0m"  # red, reset
-
-        lines.append(line)
+    for line in diff_lines:
+        line_color = _DIFF_COLORS.get(line[:3]) or _DIFF_COLORS.get(line[:1])
+        lines.append(f"{line_color}{line}{_RESET}" if line_color else line)
 
     return "".join(lines)
@@ -1,3 +1,4 @@
+# cython: language_level=3
 # Copyright (C) 2022  Max Wiklund
 #
 # Licensed under the Apache License, Version 2.0 (the “License”);
@@ -15,18 +16,93 @@
 import ast
 import io
 import logging
+import re
 import token
 import tokenize
-from typing import Callable, List
+from typing import Callable, List, Sequence, Tuple, Union
 
-from mayaff import flags
+from mayaff import file_resources, flags
 from mayaff.config import MayaArgsConfig
 
 LOG = logging.getLogger(__name__)
+# Token types the parser uses, everything else (comments, NL, strings etc.) is dropped by `Lexer`.
+# NEWLINE is kept as it ends a statement.
+_PARSED_TOKEN_TYPES = frozenset((token.NAME, token.OP, token.NEWLINE))
+# Anything that can separate the tokens the parser sees: whitespace, line continuations and comments.
+# A comment is consumed up to the end of the line so it can't overlap with the other alternatives and backtrack.
+_RE_TOKEN_SEPARATOR = r"(?:\s|\\|#[^\n]*(?=\n|\Z))*"
+# Token returned by `Lexer` at end of file, compare with `is`.
+EOF_TOKEN = tokenize.TokenInfo(token.ENDMARKER, "", (0, 0), (0, 0), "")
+# Key marking a complete module path in the trie from `_build_module_trie`.
+_MODULE_PATH_END = None
+
+
+def may_import_modules(source_code: Union[str, bytes], modules: Sequence[Tuple[str, str]]) -> bool:
+    """Cheap substring check if source code could import any of the maya modules.
+
+    Args:
+        source_code: Source code to check, file content can be checked before decoding it.
+        modules: Maya modules to look for e.g `[("maya", "cmds")]`.
+
+    Returns:
+        False if none of the modules can be imported by the source code else True.
+
+    """
+    if isinstance(source_code, bytes):
+        # Python source encodings are ascii compatible so ascii module names are the same bytes in every file.
+        # Other names depend on the encoding of the file, leave those to the check of the decoded source.
+        try:
+            modules = [(package.encode("ascii"), module.encode("ascii")) for package, module in modules]
+        except UnicodeEncodeError:
+            return True
+
+    # Both `import maya.cmds` and `from maya import cmds` contain the package and the module name.
+    return any(package in source_code and module in source_code for package, module in modules)
+
+
+def _build_module_trie(maya_modules: List[str]) -> dict:
+    """Build trie of the tokens in the module paths e.g `maya.cmds.` -> `{"maya": {".": {"cmds": {".": {None: True}}}}}`.
+
+    Args:
+        maya_modules: Names maya modules are imported as e.g `["cmds", "maya.cmds"]`.
+
+    Returns:
+        Nested dicts keyed by token string.
+
+    """
+    trie = {}
+    for module in maya_modules:
+        node = trie
+        for name in module.split("."):
+            node = node.setdefault(name, {}).setdefault(".", {})
+        node[_MODULE_PATH_END] = True
+    return trie
+
+
+def _compile_command_call_re(maya_modules: List[str]) -> re.Pattern:
+    """Compile regular expression matching anything that can tokenize as a maya command call e.g `cmds.name(`.
+
+    Args:
+        maya_modules: Names maya modules are imported as e.g `["cmds", "maya.cmds"]`.
+
+    Returns:
+        Compiled regular expression.
+
+    """
+    dot = f"{_RE_TOKEN_SEPARATOR}\\.{_RE_TOKEN_SEPARATOR}"
+    modules = "|".join(dot.join(map(re.escape, module.split("."))) for module in maya_modules)
+    return re.compile(rf"\b(?:{modules}){dot}\w+{_RE_TOKEN_SEPARATOR}\(")
 
 
 class Lexer(object):
-    """Python lexer class with peek method."""
+    """Python lexer class with peek method.
+
+    Only NAME, OP and NEWLINE tokens are produced. Tokens are accessed by index (`tok[0]` type,
+    `tok[1]` string) instead of by `tokenize.TokenInfo` attribute name, which is slower on the hot path.
+
+    """
+
+    __slots__ = ("_tokens_generator", "_peeked", "_token")
 
     def __init__(self, read_line: Callable):
         """Construct class and do nothing.
@@ -35,9 +111,10 @@ class Lexer(object):
             read_line: Read line function from `io.StringIO` or `open`.
 
         """
-        super().__init__()
-        self._tokens_generator = tokenize.generate_tokens(read_line)
-        self._tokens_ahead = []
+        self._tokens_generator = (
+            tok for tok in tokenize.generate_tokens(read_line) if tok[0] in _PARSED_TOKEN_TYPES
+        )
+        self._peeked = None  # The grammar only ever looks one token ahead.
         self._token = None
 
     def token(self) -> tokenize.TokenInfo:
@@ -47,34 +124,38 @@ class Lexer(object):
     def _next_token(self) -> tokenize.TokenInfo:
         """Get next token.
 
-        Raises:
-            StopIteration: If you reach end of file.
-
         Returns:
-            Next token from source.
+            Next token from source or `EOF_TOKEN` if you reach end of file.
 
         """
-        if self._tokens_ahead:
-            return self._tokens_ahead.pop()
-        return next(self._tokens_generator)
+        if self._peeked is not None:
+            tok, self._peeked = self._peeked, None
+            return tok
+        try:
+            return next(self._tokens_generator)
+        except StopIteration:
+            return EOF_TOKEN
 
-    def advance(self) -> None:
-        """Consume next token."""
+    def advance(self) -> tokenize.TokenInfo:
+        """Consume next token.
+
+        Returns:
+            Consumed token or `EOF_TOKEN` if you reach end of file.
+
+        """
         self._token = self._next_token()
+        return self._token
 
     def peek(self) -> tokenize.TokenInfo:
         """Look at next token.
 
-        Raises:
-            StopIteration: If you reach end of file.
-
         Returns:
-            Next token from source without consuming it.
+            Next token from source without consuming it or `EOF_TOKEN` if you reach end of file.
 
         """
-        tok = self._next_token()
-        self._tokens_ahead.append(tok)
-        return tok
+        if self._peeked is None:
+            self._peeked = self._next_token()
+        return self._peeked
 
 
 class MayaImportVisitor(ast.NodeVisitor):
@@ -85,6 +166,15 @@ class MayaImportVisitor(ast.NodeVisitor):
         super().__init__()
         self.maya_imports = []
         self.modules = modules
+        # Lookups for `import maya.cmds` and `from maya import cmds`.
+        self._dotted_modules = {".".join(module) for module in modules}
+        self._from_modules = {}
+        for module, imp in modules:
+            self._from_modules.setdefault(module, set()).add(imp)
+
+    def reset(self) -> None:
+        """Clear found imports to visit another tree."""
+        self.maya_imports.clear()
 
     def visit_Import(self, node: ast.Import) -> None:
         """Code to check if `maya.cmds` is imported.
@@ -94,9 +184,8 @@ class MayaImportVisitor(ast.NodeVisitor):
 
         """
         for _import in node.names:
-            for imp in self.modules:
-                if _import.name == ".".join(imp):
-                    self.maya_imports.append(_import.asname or _import.name)
+            if _import.name in self._dotted_modules:
+                self.maya_imports.append(_import.asname or _import.name)
 
     def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
         """Code to check if `maya.cmds` is imported.
@@ -105,10 +194,13 @@ class MayaImportVisitor(ast.NodeVisitor):
             node: Node to check if maya is imported.
 
         """
+        names = self._from_modules.get(node.module)
+        if not names:
+            return
+
         for _import in node.names:
-            for module, imp in self.modules:
-                if node.module == module and _import.name == imp:
-                    self.maya_imports.append(_import.asname or _import.name)
+            if _import.name in names:
+                self.maya_imports.append(_import.asname or _import.name)
 
 
 class MayaFlagsParser(object):
@@ -118,16 +210,31 @@ class MayaFlagsParser(object):
 
     """
 
-    def __init__(self, config: MayaArgsConfig):
+    __slots__ = (
+        "_config",
+        "_stop_at_first_match",
+        "_found_maya_modules",
+        "_module_trie",
+        "_import_visitor",
+        "_command_call_re",
+        "_lexer",
+        "_command_flags",
+    )
+
+    def __init__(self, config: MayaArgsConfig, stop_at_first_match: bool = False):
         """Construct parser and do nothing.
 
         Args:
             config(MayaArgsConfig): Config class to use for parsing.
+            stop_at_first_match: If True stop parsing after the first maya command with flags to reformat.
 
         """
-        super().__init__()
         self._config = config
+        self._stop_at_first_match = stop_at_first_match
         self._found_maya_modules = []
+        self._module_trie = {}
+        self._import_visitor = MayaImportVisitor(config.modules)
+        self._command_call_re = None
         self._lexer: Lexer = None
         self._command_flags = []
 
@@ -141,33 +248,36 @@ class MayaFlagsParser(object):
             list: Found maya commands with flags information.
 
         """
-        with open(file_name) as f:
-            self._parse_maya_imports(f.read(), file_name)
-            if not self._found_maya_modules:
-                LOG.debug(f"No maya commands found in {file_name}")
-                return []
-
-            self._lexer = Lexer(f.readline)
+        data = file_resources.read_file_bytes(file_name)
+        if not may_import_modules(data, self._config.modules):
+            return []
 
-        self._parse_stream()
-        return self._command_flags
+        return self.parse_string(file_resources.decode_source(data)[0], file_name, check_imports=False)
 
-    def parse_string(self, source_code: str, file_name: str = "<unknown>") -> List[flags.FlagKwargs]:
+    def parse_string(
+        self, source_code: str, file_name: str = "<unknown>", check_imports: bool = True
+    ) -> List[flags.FlagKwargs]:
         """Parse source code to maya flags.
 
         Args:
             source_code: Source code (python) with maya commands to find.
             file_name: File path to source.
+            check_imports: If False the caller already checked the source with `may_import_modules`.
 
         Returns:
             list: Found maya commands with flags information.
 
         """
-        self._parse_maya_imports(source_code, file_name)
+        self._command_flags = []
+        self._parse_maya_imports(source_code, file_name, check_imports)
         if not self._found_maya_modules:
             LOG.debug(f"No maya commands found in source.")
             return []
 
+        if not self._command_call_re.search(source_code):
+            LOG.debug("No maya command calls found in source.")
+            return []
+
         self._lexer = Lexer(io.StringIO(source_code).readline)
         self._parse_stream()
         return self._command_flags
@@ -175,21 +285,25 @@ class MayaFlagsParser(object):
     def _parse_stream(self) -> None:
         """Parse tokens."""
         while True:
-            try:
-                self._lexer.advance()  # Consume next token.
-                if self._lexer.token().type != token.NAME:
-                    continue
+            tok = self._lexer.advance()  # Consume next token.
+            if tok is EOF_TOKEN:
+                break
 
-                if self._is_maya_command():
-                    self._command_flags += filter(None, [self._parse_command_flags(self._lexer.token().string)])
-                    continue
+            if tok[0] != token.NAME:
+                continue
 
-            except StopIteration:
-                break
+            if self._is_maya_command():
+                command_flags = self._parse_command_flags(self._lexer.token()[1])
+                if command_flags is not None:
+                    self._command_flags.append(command_flags)
+                    if self._stop_at_first_match:
+                        break
 
     def _parse_command_flags(self, command_name: str) -> flags.FlagKwargs:
         """Parse command args.
 
+        Nested maya commands are parsed with an explicit stack of their parent commands instead of recursion.
+
         Args:
             command_name: Name of maya command.
 
@@ -197,65 +311,53 @@ class MayaFlagsParser(object):
             list: Kwargs object representing found maya flags token data.
 
         """
+        parents = []  # (command_name, flags_map, flag_tokens, scope) of commands the current command is nested in.
         flag_tokens = []
+        flags_map = self._config.get_flags(command_name)
         scope = 0
         while True:
-            try:
-                self._lexer.advance()  # Consume next token.
+            tok = self._lexer.advance()  # Consume next token.
+            # At end of file, fall through and close all open commands.
+            if tok is not EOF_TOKEN:
                 # We need to keep operators for scope tracking.
-                if self._lexer.token().type not in (token.OP, token.NAME):
+                if tok[0] not in (token.OP, token.NAME):
                     continue
 
-                if self.toke_equal_to(self._lexer.token(), token.OP, "("):
+                if tok[0] == token.OP and tok[1] == "(":
                     scope += 1
                     continue
-                elif self.toke_equal_to(self._lexer.token(), token.OP, ")"):
+                elif tok[0] == token.OP and tok[1] == ")":
                     scope -= 1
                     continue
 
                 if self._is_maya_command():
-                    flag_tokens += filter(
-                        None,
-                        [self._parse_command_flags(self._lexer.token().string)],
-                    )
+                    parents.append((command_name, flags_map, flag_tokens, scope))
+                    command_name = self._lexer.token()[1]
+                    flag_tokens = []
+                    flags_map = self._config.get_flags(command_name)
+                    scope = 0
                     continue
 
+                tok = self._lexer.token()  # Looking for a maya command can consume tokens.
+
                 if scope > 1:
                     # An open parenthesis we don't want to account for has been open.
                     # Continue until the scope hase been closed.
                     continue
 
-                if scope == 0:  # End of maya command function.
-                    break
-
-                if self._is_maya_flag(command_name):
-                    flag_tokens.append(
-                        flags.create_flag_arg(
-                            self._lexer.token(),
-                            self._config.get_flags(command_name).get(self._lexer.token().string, ""),
-                        )
-                    )
+                if scope != 0:
+                    if self._is_maya_flag(flags_map):
+                        flag_tokens.append(flags.create_flag_arg(tok, flags_map[tok[1]]))
                     continue
 
-            except StopIteration:
-                break
-
-        return flags.FlagKwargs(command_name=command_name, flag_tokens=flag_tokens) if flag_tokens else None
+            # End of maya command function.
+            command_flags = flags.FlagKwargs(command_name=command_name, flag_tokens=flag_tokens) if flag_tokens else None
+            if not parents:
+                return command_flags
 
-    @staticmethod
-    def toke_equal_to(tok: tokenize.TokenInfo, type_: int, text: str = "") -> bool:
-        """Check if token matches expected values.
-
-        Args:
-            tok: Token to check.
-            type_: Token type to compare.
-            text (str, optional): Text value to compare.
-
-        Returns:
-            True if token matches expected values else False.
-
-        """
-        return tok.type == type_ and tok.string == text if text else True
+            command_name, flags_map, flag_tokens, scope = parents.pop()
+            if command_flags is not None:
+                flag_tokens.append(command_flags)
 
     def _is_maya_command(self) -> bool:
         """Check if current token is maya command.
@@ -270,51 +372,58 @@ class MayaFlagsParser(object):
         # If the code has reached this far we know that whatever `cmds` has been imported as and a `.` is behind us
         # E.g `cmds.`.
         self._lexer.advance()  # Consume final token e.g maya command name.
-        return bool(self._config.get_flags(self._lexer.token().string) and self.toke_equal_to(self._lexer.peek(), token.OP, "("))
+        peek = self._lexer.peek()
+        return self._config.has_command(self._lexer.token()[1]) and peek[0] == token.OP and peek[1] == "("
 
-    def _is_maya_flag(self, command_name: str) -> bool:
+    def _is_maya_flag(self, flags_map: dict) -> bool:
         """Check if current token is maya flag name.
 
         Args:
-            command_name: Maya command name to check flag for.
+            flags_map: Flags dict of the maya command to check flag for.
 
         Returns:
             True if current token is maya flag else False.
 
         """
-        return (
-            self._lexer.token().type == token.NAME
-            and self._config.get_flags(command_name).get(self._lexer.token().string)
-            and self.toke_equal_to(self._lexer.peek(), token.OP, "=")
-        )
+        tok = self._lexer.token()
+        peek = self._lexer.peek()
+        return tok[0] == token.NAME and bool(flags_map.get(tok[1])) and peek[0] == token.OP and peek[1] == "="
 
     def _is_maya_module(self) -> bool:
         """Check if cmds module found."""
-        if not self._found_maya_modules or self._lexer.token().type != token.NAME:
+        if not self._found_maya_modules or self._lexer.token()[0] != token.NAME:
             return False
 
-        module_string = self._lexer.token().string
-        maya_module_paths = [f"{m}." for m in self._found_maya_modules]  # Add a dot at the end.
+        node = self._module_trie.get(self._lexer.token()[1])
+        if node is None:
+            return False
 
         while True:
             # Consume tokens until we no longer match import maya module.
-            if any(m.startswith(module_string + self._lexer.peek().string) for m in maya_module_paths):
-                self._lexer.advance()
-                module_string += self._lexer.token().string
-            else:
+            child = node.get(self._lexer.peek()[1])
+            if child is None:
                 break
+            self._lexer.advance()
+            node = child
 
-        return module_string in maya_module_paths
+        return _MODULE_PATH_END in node
 
-    def _parse_maya_imports(self, source_code: str, file_name: str) -> None:
+    def _parse_maya_imports(self, source_code: str, file_name: str, check_imports: bool = True) -> None:
         """Check if maya is imported is source code.
 
         Args:
             source_code: Source code to parse.
             file_name: File path to source.
+            check_imports: If False skip the substring check done before parsing the source.
 
         """
+        if check_imports and not may_import_modules(source_code, self._config.modules):
+            self._found_maya_modules = []
+            return
+
         tree = ast.parse(source_code, file_name)
-        import_visitor = MayaImportVisitor(self._config.modules)
-        import_visitor.visit(tree)
-        self._found_maya_modules = import_visitor.maya_imports
+        self._import_visitor.reset()
+        self._import_visitor.visit(tree)
+        self._found_maya_modules = self._import_visitor.maya_imports
+        self._module_trie = _build_module_trie(self._found_maya_modules)
+        self._command_call_re = _compile_command_call_re(self._found_maya_modules)
@@ -31,15 +31,25 @@ def reformat(source_code: str, command_flags: List[flags.FlagKwargs]) -> str:
 
     lines = source_code.split("\n")
 
-    def _format(command_flag: flags.FlagKwargs) -> None:
-        for node in reversed(command_flag.flag_tokens):
-            if isinstance(node, flags.FlagKwargs):
-                _format(node)
-            else:
-                line = lines[node.lineno]
-                lines[node.lineno] = line[: node.start] + node.long_name + line[node.end :]
-
-    for flag in reversed(command_flags):
-        _format(flag)
+    edits_per_line = {}
+    nodes = list(command_flags)
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, flags.FlagKwargs):
+            nodes.extend(node.flag_tokens)
+        else:
+            edits_per_line.setdefault(node.lineno, []).append(node)
+
+    # Rebuild each edited line once instead of once per flag on the line.
+    for lineno, edits in edits_per_line.items():
+        line = lines[lineno]
+        parts = []
+        position = 0
+        for node in sorted(edits, key=lambda n: n.start):
+            parts.append(line[position : node.start])
+            parts.append(node.long_name)
+            position = node.end
+        parts.append(line[position:])
+        lines[lineno] = "".join(parts)
 
     return "\n".join(lines)
@@ -16,10 +16,20 @@ from setuptools import find_packages, setup
 
 import mayaff
 
+try:
+    from Cython.Build import cythonize
+except ImportError:
+    ext_modules = []  # Use the pure python parser.
+else:
+    ext_modules = cythonize(["mayaff/pyparser.py"], compiler_directives={"language_level": "3"})
+    for extension in ext_modules:
+        extension.optional = True  # Fall back to the pure python parser if compilation fails.
+
 setup(
     name="mayaff",
     version=mayaff.__version__,
     packages=find_packages(exclude=("test*", "tests*")),
+    ext_modules=ext_modules,
     url="https://github.com/maxWiklund/mayaFlagFormatter",
     license="Apache License, Version 2.0",
     author="Max Wiklund",
@@ -38,6 +48,7 @@ setup(
         "Topic :: Software Development :: Quality Assurance",
     ],
     entry_points={"console_scripts": ["mayaff = mayaff:run"]},
+    extras_require={"speedups": ["orjson"]},
     package_data={"mayaff.maya_configs": ["*.json"]},
     description="Format maya command flags",
 )
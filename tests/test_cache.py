@@ -0,0 +1,66 @@
+from unittest import TestCase, mock
+
+import os
+import tempfile
+
+import mayaff
+from mayaff import cache, config, mayaff_api
+
+CLEAN_SOURCE_CODE = "from maya import cmds\ncmds.about(linux=True)\n"
+
+
+class TestCache(TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = tmp_dir.name
+        self.set_cache_dir(os.path.join(self.tmp_dir, "cache"))
+
+        self.file_name = os.path.join(self.tmp_dir, "test.py")
+        self.write_file(CLEAN_SOURCE_CODE)
+
+    def set_cache_dir(self, cache_dir):
+        for name, value in (("CACHE_DIR", cache_dir), ("_CACHE_FILE", os.path.join(cache_dir, "clean_files.txt"))):
+            patcher = mock.patch.object(cache, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def write_file(self, source_code):
+        with open(self.file_name, "w") as f:
+            f.write(source_code)
+
+    def format_files(self, config_cls):
+        # Few files are checked on threads in this process, so patching `format_file` applies to them.
+        with mock.patch.object(mayaff_api, "format_file", wraps=mayaff_api.format_file) as format_file:
+            result = mayaff.format_files([self.file_name], config_cls, check_only=True, use_cache=True)
+        return result, format_file.call_count
+
+    def test_skip_cached_file(self):
+        config_cls = config.MayaArgsConfig("2022")
+        self.assertEqual(((0, 0), 1), self.format_files(config_cls))
+        self.assertEqual(1, len(cache.load_hashes()))
+        self.assertEqual(((0, 0), 0), self.format_files(config_cls))
+
+    def test_changed_file_not_cached(self):
+        config_cls = config.MayaArgsConfig("2022")
+        self.format_files(config_cls)
+        self.write_file("from maya import cmds\ncmds.about(li=True)\n")
+
+        self.assertEqual(((1, 0), 1), self.format_files(config_cls))
+        # Files with flags to reformat are never cached.
+        self.assertEqual(((1, 0), 1), self.format_files(config_cls))
+
+    def test_config_invalidates_cache(self):
+        self.format_files(config.MayaArgsConfig("2022"))
+        self.assertEqual(((0, 0), 1), self.format_files(config.MayaArgsConfig("2023")))
+        self.assertEqual(((0, 0), 1), self.format_files(config.MayaArgsConfig("2023", [("pymel", "core")])))
+        self.assertEqual(3, len(cache.load_hashes()))
+
+    def test_unwritable_cache_dir(self):
+        # A file where the cache directory should be makes it impossible to create.
+        self.set_cache_dir(os.path.join(self.file_name, "cache"))
+        config_cls = config.MayaArgsConfig("2022")
+
+        self.assertEqual(((0, 0), 1), self.format_files(config_cls))
+        self.assertEqual(set(), cache.load_hashes())
+        self.assertEqual(((0, 0), 1), self.format_files(config_cls))
@@ -0,0 +1,89 @@
+from unittest import TestCase, skipUnless
+
+import os
+import socket
+import tempfile
+import threading
+
+if hasattr(socket, "AF_UNIX"):
+    from mayaff import daemon
+
+SOURCE_CODE = "from maya import cmds\ncmds.about(li=True)\n"
+EXPECTED_RESULT = "from maya import cmds\ncmds.about(linux=True)\n"
+
+
+@skipUnless(hasattr(socket, "AF_UNIX"), "Unix sockets are not supported.")
+class TestDaemon(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.socket_path = os.path.join(cls.tmp_dir.name, "mayaff.sock")
+        cls.server = daemon.MayaffServer(cls.socket_path)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.tmp_dir.cleanup()
+
+    def request(self, **data):
+        return daemon.request({"cmd": "format", **data}, socket_path=self.socket_path)
+
+    def write_file(self, source_code):
+        file_name = os.path.join(self.tmp_dir.name, "test.py")
+        with open(file_name, "w") as f:
+            f.write(source_code)
+        return file_name
+
+    def read_file(self, file_name):
+        with open(file_name) as f:
+            return f.read()
+
+    def test_format_source(self):
+        self.assertEqual({"changed": True, "source": EXPECTED_RESULT}, self.request(source=SOURCE_CODE))
+        self.assertEqual({"changed": False, "source": EXPECTED_RESULT}, self.request(source=EXPECTED_RESULT))
+
+    def test_format_path(self):
+        file_name = self.write_file(SOURCE_CODE)
+        self.assertEqual({"changed": True}, self.request(path=file_name, version="2022"))
+        self.assertEqual(EXPECTED_RESULT, self.read_file(file_name))
+
+    def test_check_path(self):
+        file_name = self.write_file(SOURCE_CODE)
+        self.assertEqual({"changed": True}, self.request(path=file_name, check=True))
+        self.assertEqual(SOURCE_CODE, self.read_file(file_name))
+
+    def test_diff_path(self):
+        file_name = self.write_file(SOURCE_CODE)
+        response = self.request(path=file_name, diff=True)
+
+        self.assertTrue(response["changed"])
+        self.assertIn("-cmds.about(li=True)\n+cmds.about(linux=True)\n", response["diff"])
+        self.assertNotIn("\033[", response["diff"])
+        self.assertIn("\033[", self.request(path=file_name, diff=True, color=True)["diff"])
+        self.assertEqual(SOURCE_CODE, self.read_file(file_name))
+
+    def test_invalid_requests(self):
+        self.assertIn("error", self.request(cmd="reformat", source=SOURCE_CODE))
+        self.assertIn("error", self.request(path=os.path.join(self.tmp_dir.name, "missing.py")))
+        self.assertIn("Unknown config version", self.request(source=SOURCE_CODE, version="../../x")["error"])
+        self.assertIn("Invalid modules", self.request(source=SOURCE_CODE, modules="maya")["error"])
+
+    def test_relative_path(self):
+        with self.assertRaisesRegex(ValueError, "Expected absolute path"):
+            self.server.handle_request_data({"cmd": "format", "path": "test.py", "check": True})
+
+        # The client resolves relative paths against its own working directory.
+        self.write_file(SOURCE_CODE)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.tmp_dir.name)
+        self.assertEqual({"changed": True}, self.request(path="test.py", check=True))
+
+    def test_socket_permissions(self):
+        self.assertEqual(0o600, os.stat(self.socket_path).st_mode & 0o777)
+
+    def test_serve_already_running(self):
+        with self.assertRaises(UserWarning):
+            daemon.serve(self.socket_path)
+        self.assertTrue(daemon.is_running(self.socket_path))
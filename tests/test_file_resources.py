@@ -0,0 +1,39 @@
+import os
+import re
+import tempfile
+from unittest import TestCase
+
+from mayaff import file_resources
+
+
+class TestFindPythonFiles(TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.realpath(self._tmp_dir.name)
+        os.makedirs(os.path.join(self.root, "package"))
+        for name in ("a.py", ".hidden.py", "package/b.py", "package/c.txt", "package/skip.py"):
+            with open(os.path.join(self.root, name), "w") as f:
+                f.write("")
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_exclude_pattern_matches_file_name(self):
+        found = file_resources.find_python_files([self.root], [], exclude_pattern=re.compile(r"\..+"))
+
+        expected = [
+            os.path.join(self.root, "a.py"),
+            os.path.join(self.root, "package", "b.py"),
+            os.path.join(self.root, "package", "skip.py"),
+        ]
+        self.assertEqual(sorted(expected), sorted(found))
+
+    def test_exclude_files(self):
+        found = file_resources.find_python_files(
+            [self.root, os.path.join(self.root, "a.py")],
+            [os.path.join(self.root, "package", "skip.py")],
+            exclude_pattern=re.compile(r"\..+"),
+        )
+
+        expected = [os.path.join(self.root, "a.py"), os.path.join(self.root, "package", "b.py")]
+        self.assertEqual(sorted(expected), sorted(found))
@@ -0,0 +1,64 @@
+from unittest import TestCase, mock
+
+import gc
+import os
+import tempfile
+
+import mayaff
+from mayaff import config, output
+
+SOURCE_CODE = "from maya import cmds\ncmds.about(li=True)\n"
+EXPECTED_RESULT = "from maya import cmds\ncmds.about(linux=True)\n"
+
+
+class TestFormatFiles(TestCase):
+    config_cls = config.MayaArgsConfig("2022")
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = tmp_dir.name
+
+    def write_files(self, number_of_files):
+        file_names = [os.path.join(self.tmp_dir, f"test_{i}.py") for i in range(number_of_files)]
+        for file_name in file_names:
+            with open(file_name, "w") as f:
+                f.write(SOURCE_CODE)
+        return file_names
+
+    def assert_files_formatted(self, file_names):
+        for file_name in file_names:
+            with open(file_name) as f:
+                self.assertEqual(EXPECTED_RESULT, f.read())
+
+    def test_keep_frozen_objects(self):
+        file_names = self.write_files(1)
+        gc.freeze()
+        self.addCleanup(gc.unfreeze)
+        freeze_count = gc.get_freeze_count()
+
+        self.assertEqual((1, 0), mayaff.format_files(file_names, self.config_cls, quiet=True))
+        self.assertEqual(freeze_count, gc.get_freeze_count())
+        self.assert_files_formatted(file_names)
+
+    def test_format_files_in_batches(self):
+        file_names = self.write_files(11)
+        invalid_file_name = os.path.join(self.tmp_dir, "invalid.py")
+        with open(invalid_file_name, "w") as f:
+            f.write("from maya import cmds\ndef f(:\n")
+
+        # With one worker the first batch has 4 files and the following batches 2.
+        with mock.patch.object(mayaff, "_CHUNK_SIZE", 2), mock.patch.object(mayaff, "_THREAD_POOL_THRESHOLD", 4):
+            with mock.patch.object(output, "print_failed"):
+                result = mayaff._format_files(
+                    (file_name for file_name in [*file_names[:5], invalid_file_name, *file_names[5:]]),
+                    self.config_cls,
+                    quiet=True,
+                    single_thread=True,
+                )
+
+        self.assertEqual((11, 1, 12), result)
+        self.assert_files_formatted(file_names)
+
+    def test_format_no_files(self):
+        self.assertEqual((0, 0, 0), mayaff._format_files(iter([]), self.config_cls))
@@ -1,6 +1,8 @@
 from unittest import TestCase
 
-from mayaff import config, mayaff_api
+from mayaff import config, mayaff_api, pyparser
+import os
+import tempfile
 import textwrap
 
 
@@ -189,6 +191,52 @@ class TestReformat(TestCase):
 
         self.assertEqual(expected_result, mayaff_api.format_string(source_code, config=self.config_cls))
 
+    def test_nested_flags_on_one_line(self):
+        source_code = textwrap.dedent(
+            """
+            from maya import cmds
+            cmds.textureWindow(source, ra=cmds.about(ppc=True, li=True), itn="t")
+            """
+        )
+
+        expected_result = textwrap.dedent(
+            """
+            from maya import cmds
+            cmds.textureWindow(source, removeAllImages=cmds.about(macOSppc=True, linux=True), imageToTextureNumber="t")
+            """
+        )
+
+        self.assertEqual(expected_result, mayaff_api.format_string(source_code, config=self.config_cls))
+
+    def test_comments_inside_command(self):
+        source_code = textwrap.dedent(
+            """
+            from maya import cmds
+            cmds.about(  # Platform.
+                li=True,  # Linux.
+            )
+            """
+        )
+
+        expected_result = textwrap.dedent(
+            """
+            from maya import cmds
+            cmds.about(  # Platform.
+                linux=True,  # Linux.
+            )
+            """
+        )
+
+        self.assertEqual(expected_result, mayaff_api.format_string(source_code, config=self.config_cls))
+
+    def test_comment_banner_after_import(self):
+        # A long comment must not make the command call search backtrack exponentially.
+        banner = "#" * 79
+        source_code = f"import maya.cmds as cmds\n{banner}\ncmds.ls(sl=True)\n"
+        expected_result = f"import maya.cmds as cmds\n{banner}\ncmds.ls(selection=True)\n"
+
+        self.assertEqual(expected_result, mayaff_api.format_string(source_code, config=self.config_cls))
+
     def test_parse_python2_raise_exception(self):
         source_code = textwrap.dedent(
             """
@@ -224,3 +272,69 @@ class TestReformat(TestCase):
         _config = config.MayaArgsConfig(modules=[("ABC.maya2", "abc")])
 
         self.assertEqual(expected_result, mayaff_api.format_string(source_code, config=_config))
+
+
+class TestParseFile(TestCase):
+    config_cls = config.MayaArgsConfig("2022")
+
+    def test_parse_file(self):
+        source_code = textwrap.dedent(
+            """
+            from maya import cmds
+            cmds.about(li=True)
+            """
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_name = os.path.join(tmp_dir, "test.py")
+            with open(file_name, "w") as f:
+                f.write(source_code)
+
+            command_flags = pyparser.MayaFlagsParser(self.config_cls).parse_file(file_name)
+
+        self.assertEqual(1, len(command_flags))
+        self.assertEqual("about", command_flags[0].command_name)
+        self.assertEqual("linux", command_flags[0].flag_tokens[0].long_name)
+
+    def test_reuse_parser(self):
+        parser = pyparser.MayaFlagsParser(self.config_cls)
+        command_flags = parser.parse_string("from maya import cmds as mc\nmc.about(li=True)\n")
+        self.assertEqual(1, len(command_flags))
+
+        # The alias from the previous source must not be found.
+        self.assertEqual([], parser.parse_string("import mc\nmc.about(li=True)\n"))
+        self.assertEqual(1, len(command_flags))
+
+    def test_may_import_modules_bytes(self):
+        modules = [("maya", "cmds")]
+        self.assertTrue(pyparser.may_import_modules(b"from maya import cmds\n", modules))
+        self.assertFalse(pyparser.may_import_modules(b"import os\n", modules))
+
+    def test_non_ascii_module(self):
+        modules = [("mäya", "cmds")]
+        # Non ascii names can't be checked before decoding.
+        self.assertTrue(pyparser.may_import_modules(b"import os\n", modules))
+
+        config_cls = config.MayaArgsConfig("2022", modules)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_name = os.path.join(tmp_dir, "test.py")
+            with open(file_name, "w", encoding="utf-8") as f:
+                f.write("from mäya import cmds\ncmds.about(li=True)\n")
+
+            self.assertTrue(mayaff_api.format_file(file_name, config_cls, quiet=True))
+            with open(file_name, encoding="utf-8") as f:
+                self.assertEqual("from mäya import cmds\ncmds.about(linux=True)\n", f.read())
+
+    def test_format_invalid_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_name = os.path.join(tmp_dir, "test.py")
+            with open(file_name, "w") as f:
+                f.write("def f(:\n")
+
+            # Files without maya imports are not parsed.
+            self.assertFalse(mayaff_api.format_file(file_name, self.config_cls))
+
+            with open(file_name, "w") as f:
+                f.write("from maya import cmds\ndef f(:\n")
+
+            with self.assertRaises(SyntaxError):
+                mayaff_api.format_file(file_name, self.config_cls)